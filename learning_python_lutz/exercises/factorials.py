@@ -0,0 +1,59 @@
+from bisect import bisect_right, insort
+from collections import OrderedDict
+
+SPLIT = 32                     # Ranges shorter than this are multiplied in a loop
+
+
+# low * (low + 1) * ... * (high - 1), by binary splitting: multiplying the
+# halves of the range keeps both operands of each big-int product about
+# the same size, instead of growing one huge partial product step by step
+def product(low, high):
+    if high - low <= SPLIT:
+        result = 1
+        for i in range(low, high): result *= i
+        return result
+    mid = (low + high) // 2
+    return product(low, mid) * product(mid, high)
+
+
+class Factorials:
+    # N! with a bounded cache: the maxsize most recently used results are
+    # kept as checkpoints (plus 0! = 1), and a miss is computed by extending
+    # the nearest checkpoint below N, so nearby N reuse each other's work
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.cache = OrderedDict([(0, 1)])
+        self.checkpoints = [0]                 # Sorted keys of cache
+
+    def __call__(self, N):
+        if N < 0:
+            raise ValueError('factorial() not defined for negative values')
+        if N in self.cache:
+            self.cache.move_to_end(N)
+            return self.cache[N]
+        base = self.checkpoints[bisect_right(self.checkpoints, N) - 1]
+        value = self.cache[base] * product(base + 1, N + 1)
+        self.store(N, value)
+        return value
+
+    def store(self, N, value):
+        self.cache[N] = value
+        insort(self.checkpoints, N)
+        while len(self.cache) > self.maxsize + 1:
+            oldest = next(N for N in self.cache if N != 0)
+            del self.cache[oldest]
+            self.checkpoints.remove(oldest)
+
+    # Factorials of many N at once, in the order given: computed in ascending
+    # order so that each one extends the previous, whatever the cache size
+    def many(self, Ns):
+        Ns = list(Ns)
+        results = {N: self(N) for N in sorted(set(Ns))}
+        return [results[N] for N in Ns]
+
+    def binomial(self, n, k):
+        if not 0 <= k <= n: return 0
+        return self(n) // (self(k) * self(n - k))
+
+
+factorial = Factorials()
@@ -1,24 +1,353 @@
-def countLines(name):
-    return len(lines(name))
+import atexit, codecs, io, json, locale, mmap, os, stat, sys, tempfile, zlib
+from concurrent.futures import ProcessPoolExecutor
 
+CHUNKSIZE = 1024 * 1024        # Bytes read (or sliced from a mapping) per step
 
-def countChars(name):
-    charcount = 0
-    for line in lines(name):
-        charcount += len(line)
-    return charcount
+# Encodings whose characters can be counted from the raw bytes of a mapping:
+#   one byte per character, or UTF-8 (one character per non-continuation byte).
+#   Names are as normalized by codecs.lookup().
+SINGLE_BYTE = {'ascii', 'iso8859-1', 'cp1252'}
+CONTINUATION = bytes(range(0x80, 0xC0))
+
+SPLITSIZE = 64 * 1024 * 1024   # Files larger than this are counted in pieces
+
+CACHEFILE = os.path.join(os.path.expanduser('~'), '.mymod_stats.json')
+CHECKSIZE = 4096               # Bytes before an old end of file that must be
+                               #   unchanged to count just an appended tail
+
+
+def countLines(name, mapped=False, cached=False):
+    if cached: return cachedstats(name)[0]
+    return stats(name, mapped=mapped)[0]
+
+
+def countChars(name, mapped=False, cached=False):
+    if cached: return cachedstats(name)[1]
+    return stats(name, mapped=mapped)[1]
 
 
 def lines(name):
     return open(name).readlines()
 
 
-def test(name):
-    print('Lines: %s' % countLines(name))
-    print('Chars: %s' % countChars(name))
+def stats(name, chunksize=CHUNKSIZE, encoding=None, mapped=False):
+    # Single pass over the file; returns (lines, chars, bytes).
+    # With mapped=True, regular files are counted over an mmap instead.
+    encoding = encoding or locale.getpreferredencoding(False)
+    with open(name, 'rb') as file:
+        if mapped and canmap(file, encoding):
+            return mappedstats(file, chunksize, encoding)
+        return filestats(file, chunksize, encoding)
+
+
+def filestats(file, chunksize, encoding):
+    # Reads fixed-size binary chunks, decoding characters incrementally with
+    # the same newline translation as text-mode open(), so the counts match
+    # readlines() for any file size
+    decoder = io.IncrementalNewlineDecoder(
+        codecs.getincrementaldecoder(encoding)(), translate=True)
+    linecount = charcount = bytecount = 0
+    last = ''
+    while True:
+        chunk = file.read(chunksize)
+        text = decoder.decode(chunk, final=not chunk)
+        linecount += text.count('\n')
+        charcount += len(text)
+        bytecount += len(chunk)
+        if text: last = text[-1]
+        if not chunk: break
+    if last and last != '\n':  # Unterminated last line
+        linecount += 1
+    return linecount, charcount, bytecount
+
+
+def canmap(file, encoding):
+    # Pipes, devices and empty files can't be mapped; other encodings need
+    # a real decoder to count characters
+    info = os.fstat(file.fileno())
+    return stat.S_ISREG(info.st_mode) and info.st_size > 0 and mappable(encoding)
+
+
+def mappable(encoding):
+    return codecs.lookup(encoding).name in SINGLE_BYTE | {'utf-8'}
+
+
+def mappedstats(file, chunksize, encoding):
+    # Counts newlines (\n, \r\n and lone \r, like universal newlines) and
+    # characters with bytes methods on slices of the mapping: no per-line
+    # string objects, and only non-ASCII chunks are decoded (to validate
+    # them and count their characters)
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+        return joinranges([scanrange(mapping, 0, len(mapping), chunksize, encoding)])
+
+
+def scanrange(mapping, start, end, chunksize, encoding):
+    # Partial counts for mapping[start:end], plus its first and last bytes so
+    # neighbouring ranges can be joined without losing a split \r\n.
+    # Raises UnicodeDecodeError for bytes invalid in the encoding, as the
+    # streaming path does: a UTF-8 character split by the end of the range
+    # is checked here, so its continuation bytes are skipped by the next one.
+    encoding = codecs.lookup(encoding).name
+    utf8 = encoding == 'utf-8'
+    decoder = codecs.getincrementaldecoder(encoding)()
+    skip = min(straddling(mapping, start), end - start) if utf8 else 0
+    linecount = pairs = chars = 0
+    prev = b''
+    for low in range(start, end, chunksize):
+        chunk = mapping[low:min(low + chunksize, end)]
+        linecount += chunk.count(b'\n')
+        if b'\r' in chunk:
+            crlf = chunk.count(b'\r\n')
+            linecount += chunk.count(b'\r') - crlf
+            pairs += crlf
+        if prev == b'\r' and chunk[:1] == b'\n':       # \r\n split by slicing
+            linecount -= 1
+            pairs += 1
+        if not chunk.isascii() or decoder.getstate()[0]:
+            chars += len(decoder.decode(chunk[max(0, start + skip - low):]))
+        else:
+            chars += len(chunk)
+        prev = chunk[-1:]
+    if decoder.getstate()[0]:                          # Character ends past end
+        chars += 1
+    continued = end - start - chars                    # Bytes not starting one
+    if end < len(mapping):
+        if skip < end - start:
+            decoder.decode(mapping[end:end + 3], final=end + 3 >= len(mapping))
+    else:
+        decoder.decode(b'', final=True)
+    return (linecount, pairs, continued, end - start,
+            mapping[start:start + 1], mapping[end - 1:end])
+
+
+def straddling(mapping, start):
+    # Bytes at start that finish a UTF-8 character begun before it
+    for back in range(1, min(3, start) + 1):
+        lead = mapping[start - back]
+        if lead not in CONTINUATION:
+            size = 2 if lead < 0xE0 else 3 if lead < 0xF0 else 4
+            return max(0, size - back) if lead >= 0xC0 else 0
+    return 0
+
+
+def joinranges(parts):
+    # Adds up scanrange() results for consecutive ranges: (lines, chars, bytes)
+    linecount, pairs, continued, size, first, last = mergeranges(parts)
+    if size and last not in (b'\n', b'\r'):            # Unterminated last line
+        linecount += 1
+    return linecount, size - continued - pairs, size
+
+
+def mergeranges(parts):
+    # scanrange() result for the concatenation of consecutive ranges
+    linecount = pairs = continued = size = 0
+    first = prev = b''
+    for partlines, partpairs, partcontinued, partsize, partfirst, partlast in parts:
+        if not partsize: continue
+        if prev == b'\r' and partfirst == b'\n':
+            linecount -= 1
+            pairs += 1
+        linecount += partlines
+        pairs += partpairs
+        continued += partcontinued
+        size += partsize
+        first = first or partfirst
+        prev = partlast
+    return linecount, pairs, continued, size, first, prev
+
+
+def rangestats(name, start, end, chunksize, encoding):
+    # Worker-side scanrange() over one byte range of a file
+    with open(name, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+            return scanrange(mapping, start, end, chunksize, encoding)
+
+
+class StatsCache:
+    # Persistent (lines, chars, bytes) per file, in a JSON file keyed by real
+    # path and validated by size, mtime, inode and device. With append=True,
+    # a file that only grew since it was cached (a log) has just its new tail
+    # counted, starting from the recorded offset. New entries are written by
+    # save(), once per batch: with autosave=True, at interpreter exit.
+    def __init__(self, cachefile=CACHEFILE, autosave=True):
+        self.cachefile = cachefile
+        self.entries = self.load()
+        self.changed = set()                   # Paths counted since save()
+        if autosave: atexit.register(self.save)
+
+    def load(self):
+        try:
+            with open(self.cachefile) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def stats(self, name, append=False, chunksize=CHUNKSIZE, encoding=None):
+        encoding = encoding or locale.getpreferredencoding(False)
+        path = os.path.realpath(name)
+        info = os.stat(path)
+        key = [info.st_size, info.st_mtime_ns, info.st_ino, info.st_dev, encoding]
+        entry = self.entries.get(path)
+        if entry and entry['key'] == key:
+            return tuple(entry['counts'])
+
+        if not (stat.S_ISREG(info.st_mode) and mappable(encoding)):
+            counts, part = stats(path, chunksize, encoding), None
+        else:
+            start, part = 0, (0, 0, 0, 0, b'', b'')
+            if append and self.grew(path, entry, key):
+                start, part = entry['key'][0], unpackpart(entry['part'])
+            if info.st_size > start:
+                tail = rangestats(path, start, info.st_size, chunksize, encoding)
+                part = mergeranges([part, tail])
+            counts = joinranges([part])
+            part = packpart(part)
+
+        self.entries[path] = dict(key=key, counts=counts, part=part,
+                                  check=checksum(path, info.st_size))
+        self.changed.add(path)
+        return tuple(counts)
+
+    def grew(self, path, entry, key):
+        # Same file, same encoding, longer, and the bytes at the old end of
+        # file are still the same: only an appended tail is new
+        if not (entry and entry['part']): return False
+        (oldsize, oldmtime, oldino, olddev, oldencoding) = entry['key']
+        (size, mtime, ino, dev, encoding) = key
+        return ((oldino, olddev, oldencoding) == (ino, dev, encoding) and
+                size > oldsize and checksum(path, oldsize) == entry['check'])
+
+    def save(self):
+        # Merges this cache's new entries into the file as it is now, so
+        # concurrent scans keep each other's work; each writes its own
+        # temporary file and renames it into place atomically
+        if not self.changed: return
+        entries = self.load()
+        entries.update((path, self.entries[path]) for path in self.changed)
+        folder, base = os.path.split(os.path.abspath(self.cachefile))
+        fd, temp = tempfile.mkstemp(dir=folder, prefix=base + '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as file:
+                json.dump(entries, file)
+            os.replace(temp, self.cachefile)
+        except BaseException:
+            os.remove(temp)
+            raise
+        self.entries.update(entries)
+        self.changed.clear()
+
+
+def checksum(path, end):
+    # CRC of the CHECKSIZE bytes before offset end
+    start = max(0, end - CHECKSIZE)
+    with open(path, 'rb') as file:
+        file.seek(start)
+        return zlib.crc32(file.read(end - start))
+
+
+def packpart(part):            # scanrange() result as JSON-friendly values
+    return list(part[:4]) + [part[4].decode('latin-1'), part[5].decode('latin-1')]
+
+def unpackpart(part):
+    return tuple(part[:4]) + (part[4].encode('latin-1'), part[5].encode('latin-1'))
+
+
+caches = {}                    # StatsCache per cache file, loaded once
+
+def cachedstats(name, append=False, cachefile=CACHEFILE, encoding=None):
+    if cachefile not in caches:
+        caches[cachefile] = StatsCache(cachefile)
+    return caches[cachefile].stats(name, append, encoding=encoding)
+
+
+def test(name, mapped=False):
+    linecount, charcount, bytecount = stats(name, mapped=mapped)
+    print('Lines: %s' % linecount)
+    print('Chars: %s' % charcount)
+    print('Bytes: %s' % bytecount)
+
+
+def benchmark(name, reps=3):
+    # Best time and peak Python heap for readlines(), streaming and mmap
+    import timeit, tracemalloc
+    tests = [('readlines', lambda: (len(lines(name)), sum(map(len, lines(name))))),
+             ('stream', lambda: stats(name)),
+             ('mmap', lambda: stats(name, mapped=True))]
+    for label, func in tests:
+        best = min(timeit.repeat(func, number=1, repeat=reps))
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print('%-9s: %.5f secs, peak %s bytes' % (label, best, peak))
+
+
+def wc(names, workers=None, splitsize=SPLITSIZE, chunksize=CHUNKSIZE, encoding=None):
+    # Counts many files across a process pool, like wc: files larger than
+    # splitsize are cut into byte ranges counted in parallel and joined back.
+    # Prints a line per file and a total; returns [(name, counts)], total.
+    encoding = encoding or locale.getpreferredencoding(False)
+    with ProcessPoolExecutor(workers) as pool:
+        jobs = []
+        for name in names:
+            try:
+                size = os.stat(name).st_size
+                if size > splitsize and mappable(encoding) and os.path.isfile(name):
+                    parts = [pool.submit(rangestats, name, start,
+                                         min(start + splitsize, size), chunksize, encoding)
+                             for start in range(0, size, splitsize)]
+                else:
+                    parts = pool.submit(stats, name, chunksize, encoding, True)
+            except OSError as exc:
+                parts = exc
+            jobs.append((name, parts))
+
+        results, total = [], [0, 0, 0]
+        for name, parts in jobs:
+            try:
+                if isinstance(parts, Exception):
+                    raise parts
+                elif isinstance(parts, list):
+                    counts = joinranges([part.result() for part in parts])
+                else:
+                    counts = parts.result()
+            except (OSError, UnicodeDecodeError) as exc:
+                print('mymod: %s: %s' % (name, exc), file=sys.stderr)
+                continue
+            print('%8d %8d %8d %s' % (counts + (name,)))
+            results.append((name, counts))
+            total = [x + y for (x, y) in zip(total, counts)]
+        if len(results) > 1:
+            print('%8d %8d %8d total' % tuple(total))
+    return results, tuple(total)
+
+
+def walk(paths):
+    # File names under paths, expanding directories recursively
+    for path in paths:
+        if os.path.isdir(path):
+            for (dirpath, dirnames, filenames) in os.walk(path):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    yield os.path.join(dirpath, filename)
+        else:
+            yield path
 
 
 # Tests
 if __name__ == '__main__':
-    testfile = 'datafile.txt'
-    test(testfile)
+    if len(sys.argv) > 1:
+        import argparse
+        parser = argparse.ArgumentParser(description='Count lines, chars and bytes in files')
+        parser.add_argument('paths', nargs='+', help='files or directories')
+        parser.add_argument('-j', '--workers', type=int, help='worker processes')
+        parser.add_argument('--split', type=int, default=SPLITSIZE,
+                            help='byte size above which files are counted in pieces')
+        parser.add_argument('--encoding', help='text encoding, default from locale')
+        args = parser.parse_args()
+        names = list(walk(args.paths))
+        results, total = wc(names, args.workers, args.split, encoding=args.encoding)
+        sys.exit(1 if len(results) < len(names) else 0)    # Some file failed
+    else:
+        testfile = 'datafile.txt'
+        test(testfile)
@@ -1,19 +1,42 @@
+import codecs, io, locale
+
+CHUNKSIZE = 1024 * 1024
+
 def countLines(name):
-    return len(lines(name))
+    return stats(name)[0]
 
 def countChars(name):
-    charcount = 0
-    for line in lines(name): charcount += len(line)
-    return charcount
+    return stats(name)[1]
 
 def lines(name):
     return open(name).readlines()
 
+def stats(name, chunksize=CHUNKSIZE, encoding=None):
+    # One streaming pass: (lines, chars, bytes), decoded like text-mode open()
+    encoding = encoding or locale.getpreferredencoding(False)
+    decoder = io.IncrementalNewlineDecoder(
+        codecs.getincrementaldecoder(encoding)(), translate=True)
+    linecount = charcount = bytecount = 0
+    last = ''
+    with open(name, 'rb') as file:
+        while True:
+            chunk = file.read(chunksize)
+            text = decoder.decode(chunk, final=not chunk)
+            linecount += text.count('\n')
+            charcount += len(text)
+            bytecount += len(chunk)
+            if text: last = text[-1]
+            if not chunk: break
+    if last and last != '\n': linecount += 1
+    return linecount, charcount, bytecount
+
 def test(name):
-    print('Lines: %s' % countLines(name))
-    print('Chars: %s' % countChars(name))
+    linecount, charcount, bytecount = stats(name)
+    print('Lines: %s' % linecount)
+    print('Chars: %s' % charcount)
+    print('Bytes: %s' % bytecount)
 
 # Tests
 if __name__ == '__main__':
     testfile = 'datafile.txt'
-    test(testfile)
\ No newline at end of file
+    test(testfile)
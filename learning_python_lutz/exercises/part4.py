@@ -56,10 +56,39 @@ def test_adder():
 # for a simpler approach.) What happens if you pass in arguments of different
 # types? What about passing in dictionaries?
 
+# Sum/concatenate a sequence of values in one pass picked by the type of the
+#   first one, instead of repeated +=, which copies the whole accumulator at
+#   each step for strings (and mutates the first argument for lists):
+#   join for strings and bytes, chain for lists and tuples, sum (fsum when
+#   floats are involved) for numbers, update for dictionaries, and a plain
+#   left-to-right + for anything else. Mixed types still raise TypeError.
+#   Returns None when there are no values.
+import functools, itertools, math, numbers, operator
+
+def fold(values):
+    if not values: return None
+    first = values[0]
+    if isinstance(first, str):
+        return ''.join(values)
+    if isinstance(first, (bytes, bytearray)):
+        return type(first)().join(values)
+    if isinstance(first, list) and all(isinstance(value, list) for value in values):
+        return list(itertools.chain.from_iterable(values))
+    if isinstance(first, tuple) and all(isinstance(value, tuple) for value in values):
+        return tuple(itertools.chain.from_iterable(values))
+    if all(isinstance(value, numbers.Real) for value in values):
+        if any(isinstance(value, float) for value in values):
+            return math.fsum(values)
+        if all(isinstance(value, int) for value in values):
+            return sum(values)
+    if all(isinstance(value, dict) for value in values):
+        result = {}
+        for value in values: result.update(value)
+        return result
+    return functools.reduce(operator.add, values)
+
 def varargs_adder(*args):
-  sum = args[0] if args else None
-  for arg in args: sum += arg
-  return sum
+  return fold(args)
 
 def test_varargs_adder():
   # No arguments
@@ -114,10 +143,7 @@ def test_default_args_adder():
     print(default_args_adder(ugly=1, good=2))
 
 def keyword_args_adder(**args):
-	keys = list(args.keys())
-	sum = args[keys[0]]
-	for key in keys[1:]: sum += args[key]
-	return sum
+	return fold(list(args.values()))
 
 def test_keyword_args_adder():
 	# Test single argument
@@ -144,9 +170,7 @@ def test_keyword_args_adder():
 # examples.
 
 def copy_dict(dict):
-	copy = {}
-	for key in dict.keys(): copy[key] = dict[key]
-	return copy
+	return {**dict}                      # One bulk copy, not a loop over keys
 
 def test_copy_dict():
 	# Copy empty dictionary
@@ -177,9 +201,64 @@ def test_copy_dict():
 # passed in matter?
 
 def add_dict(dict1, dict2):
-    for key in dict2.keys(): dict1[key] = dict2[key]
+    dict1.update(dict2)
     return dict1
 
+# Lazy alternative: a read-through view of any number of dictionaries merged
+#   left to right (later ones win, as in add_dict), built without copying
+#   them. Writes and deletes land in a private top layer, so the merged
+#   dictionaries are never changed (copy-on-write), and materialize() returns
+#   the merge as one plain dictionary when a real copy is wanted.
+from collections.abc import MutableMapping
+
+class MergedDict(MutableMapping):
+    DELETED = object()                  # Marks keys deleted from the view
+
+    def __init__(self, *dicts):
+        self.layers = list(dicts)
+        self.top = {}
+
+    def __getitem__(self, key):
+        if key in self.top:
+            value = self.top[key]
+            if value is self.DELETED: raise KeyError(key)
+            return value
+        for layer in reversed(self.layers):
+            if key in layer: return layer[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        self.top[key] = value
+
+    def __delitem__(self, key):
+        self[key]                       # KeyError if not in the view
+        self.top[key] = self.DELETED
+
+    def __iter__(self):                 # Keys in add_dict's order
+        seen = set()
+        for layer in self.layers + [self.top]:
+            for key in layer:
+                if key not in seen:
+                    seen.add(key)
+                    if self.top.get(key, None) is not self.DELETED: yield key
+
+    def __len__(self):
+        return sum(1 for key in self)
+
+    def __repr__(self):
+        return 'MergedDict(%r)' % self.materialize()
+
+    def materialize(self):
+        result = {}
+        for layer in self.layers: result.update(layer)
+        for (key, value) in self.top.items():
+            if value is self.DELETED: result.pop(key, None)
+            else: result[key] = value
+        return result
+
+def merge_dicts(*dicts):
+    return MergedDict(*dicts)
+
 def test_add_dict():
 	# Add 2 empty dictionaries
     d1, d2 = {}, {}
@@ -195,6 +274,13 @@ def test_add_dict():
     d2 = {'c':10, 'd': 20}
     print(add_dict(d1, d2))
 
+	# Merge lazily, without changing either dictionary
+    d1 = {'a': 1, 'b': 2, 'c': 3}
+    merged = merge_dicts(d1, d2)
+    merged['e'] = 30
+    del merged['a']
+    print(merged['c'], merged, d1)
+
 
 
 
@@ -274,7 +360,26 @@ def f6(a, b=2, *c): print(a, b, c)   # Defaults and positional varargs
 # 15 has factor 5
 # 15.0 has factor 5.0
 
+from exercises.primes import smallest_factor
+
+# Same output as the countdown above (the factor reported is the largest
+#   one, y // smallest factor), but found by trial division upward and
+#   Miller-Rabin/Pollard's rho for large y, instead of y // 2 divisions.
+#   Whole-valued floats print float factors; other floats keep the countdown.
 def print_whether_prime(y):
+    if y != int(y):
+        return print_whether_prime_countdown(y)
+    n = int(y)
+    if n // 2 <= 1:
+        print(y, 'is prime')
+        return
+    factor = smallest_factor(n)
+    if factor == n:
+        print(y, 'is prime')
+    else:
+        print(y, 'has factor', type(y)(n // factor))
+
+def print_whether_prime_countdown(y):
     x = y // 2
     while x > 1:
         if y % x == 0:
@@ -319,12 +424,60 @@ def sqrt_with_comprehension(square_list):
 def sqrt_with_generator(square_list):
     return list(math.sqrt(x) for x in square_list)
 
+# Array-native: one vectorized pass over a list, array.array or any other
+#   buffer, returning a NumPy array when NumPy is installed (buffers are read
+#   through a memoryview, so NumPy sees their item type: bytes are numbers
+#   0..255, as when iterated), else an array('d') filled straight from map(),
+#   which calls math.sqrt from C with no intermediate list
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def sqrt_with_array(square_list):
+    if numpy is not None:
+        try:
+            square_list = memoryview(square_list)
+        except TypeError:
+            pass
+        return numpy.sqrt(numpy.asarray(square_list, dtype=float))
+    return array('d', map(math.sqrt, square_list))
+
+# Streaming: consume any iterable lazily, including unbounded ones like a
+#   file, a socket reader or a generator, and yield the roots in batches of
+#   batchsize, so memory stays constant however long the stream runs.
+#   convert turns raw items (e.g. lines of text) into numbers first.
+import itertools
+
+def sqrt_batches(squares, batchsize=1024, convert=None):
+    squares = iter(squares if convert is None else map(convert, squares))
+    while True:
+        batch = list(map(math.sqrt, itertools.islice(squares, batchsize)))
+        if not batch: return
+        yield batch
+
+# The same batches as contiguous array('d') buffers, filled straight from
+#   map() with no list per batch
+def sqrt_array_batches(squares, batchsize=1024, convert=None):
+    squares = iter(squares if convert is None else map(convert, squares))
+    while True:
+        batch = array('d', map(math.sqrt, itertools.islice(squares, batchsize)))
+        if not batch: return
+        yield batch
+
 def test_sqrt_implementations():
     list_of_squares = [2, 4, 9, 16, 25]
     print(sqrt_with_loop(list_of_squares))
     print(sqrt_with_map(list_of_squares))
     print(sqrt_with_comprehension(list_of_squares))
     print(sqrt_with_generator(list_of_squares))
+    print(list(sqrt_with_array(list_of_squares)))
+    print(list(sqrt_with_array(array('d', list_of_squares))))
+    for batch in sqrt_batches(iter(list_of_squares), batchsize=2): print(batch)
+    unbounded = itertools.count(1)
+    print(next(sqrt_array_batches(unbounded, batchsize=4)))
 
 
 
@@ -348,21 +501,37 @@ def test_sqrt_implementations():
 import timeit
 
 def time_math_sqrt():
-    math_time = min(timeit.repeat(stmt="[math.sqrt(x) for x in range(1000)]", number=1000, repeat=5))
-    print('The minimum time for math.sqrt(X) is %s seconds.' % math_time)
+    math_times = timeit.repeat(stmt="[math.sqrt(x) for x in range(1000)]", setup="import math", number=1000, repeat=5)
+    print('The minimum time for math.sqrt(X) is %s seconds.' % min(math_times))
+    return math_times
 
 def time_star():
-    star_time = min(timeit.repeat(stmt="[x ** .5 for x in range(1000)]", number=1000, repeat=5))
-    print('The minimum time for X ** .5 is %s seconds.' % star_time)
+    star_times = timeit.repeat(stmt="[x ** .5 for x in range(1000)]", number=1000, repeat=5)
+    print('The minimum time for X ** .5 is %s seconds.' % min(star_times))
+    return star_times
 
 def time_pow():
-    pow_time = min(timeit.repeat(stmt="[pow(x, .5) for x in range(1000)]", number=1000, repeat=5))
-    print('The minimum time for pow(X, .5) is %s seconds.' % pow_time)
+    pow_times = timeit.repeat(stmt="[pow(x, .5) for x in range(1000)]", number=1000, repeat=5)
+    print('The minimum time for pow(X, .5) is %s seconds.' % min(pow_times))
+    return pow_times
 
-def time_square_root_implementations():
-    time_math_sqrt()
-    time_star()
-    time_pow()
+def time_sqrt_with_array():
+    squares = array('d', range(1000))
+    array_times = timeit.repeat(stmt=lambda: sqrt_with_array(squares), number=1000, repeat=5)
+    print('The minimum time for sqrt_with_array(X) is %s seconds.' % min(array_times))
+    return array_times
+
+# With store=True (or a label string), the timings are also saved to the
+#   benchmark store in scripts/benchstore.py, as the 'sqrt' suite
+def time_square_root_implementations(store=False):
+    results = []
+    for test in (time_math_sqrt, time_star, time_pow, time_sqrt_with_array):
+        times = test()
+        results.append((test.__name__, [t / 1000 for t in times], 1000))
+    if store:
+        from scripts import benchstore
+        benchstore.record('sqrt', results, store if isinstance(store, str) else None)
+    return results
 
 
 
@@ -377,12 +546,30 @@ def time_square_root_implementations():
 # queue, but what about a nonfunction approach? Would a generator make sense
 # here?
 
-def countdown(start):
+def recursive_countdown(start):
     if start == 0:
         print('stop')
     else:
         print(start, end=' ')
-        countdown(start - 1)
+        recursive_countdown(start - 1)
+
+# Generator version: no recursion limit, and nothing printed
+def countdown_numbers(start):
+    yield from range(start, 0, -1)
+
+# Same output as recursive_countdown, written to any file-like object in
+#   batches of up to batchsize numbers per write instead of one print per
+#   number, so at most one batch of text is buffered at a time
+import sys
+
+def countdown(start, file=None, batchsize=8192):
+    file = file or sys.stdout
+    numbers = countdown_numbers(start)
+    while True:
+        batch = ' '.join(map(str, itertools.islice(numbers, batchsize)))
+        if not batch: break
+        file.write(batch + ' ')
+    file.write('stop\n')
 
 def test_countdown():
     # Countdown from i = 0
@@ -394,6 +581,9 @@ def test_countdown():
     # Countdown from i > 1
     countdown(10)
 
+    # Past the recursion limit, batched into one write per 1000 numbers
+    countdown(5000, batchsize=1000)
+
 
 
 
@@ -412,7 +602,7 @@ def test_countdown():
 import functools
 
 def recursive_factorial(N):
-    if N == 1:
+    if N <= 1:
         return 1
     else:
         return N * recursive_factorial(N-1)
@@ -428,6 +618,63 @@ def iterative_factorial(N):
 def math_factorial(N):
     return math.factorial(N)
 
+# A fifth, caching variant: see factorials.py. Repeated and nearby N
+#   extend a cached checkpoint instead of starting again from 1.
+from exercises import factorials
+
+def cached_factorial(N):
+    return factorials.factorial(N)
+
+# Timed from an empty cache on every call: with the shared one, every call
+#   after the first would just be a lookup of the same N
+cached_factorial.cold = lambda N: factorials.Factorials()(N)
+
+factorial_implementations = (recursive_factorial, reduce_factorial, iterative_factorial,
+                             math_factorial, cached_factorial)
+
 def test_factorial_implementations():
-    for test in (recursive_factorial, reduce_factorial, iterative_factorial, math_factorial):
-        print(test.__name__, min(timeit.repeat(stmt=lambda: test(500), number=20, repeat=3)))
\ No newline at end of file
+    for test in factorial_implementations:
+        cold = getattr(test, 'cold', test)
+        print(test.__name__, min(timeit.repeat(stmt=lambda: cold(500), number=20, repeat=3)))
+
+# Sweep N over several orders of magnitude, timing each implementation at
+#   each N in a freshly spawned process (so no cache, GC or memory state is
+#   shared), with up to workers points running at once. Peak memory is
+#   traced on the first call, times are the best of later ones (for caching
+#   variants, of their cold form, so no call reuses the first). Prints and
+#   returns {name: [(N, best seconds per call, peak bytes, error name)]}.
+import multiprocessing, tracemalloc
+
+def time_factorial_point(name, N, repeat=3):
+    test = globals()[name]
+    number = max(1, 10000 // N)
+    try:
+        tracemalloc.start()                # First call: cold caches
+        test(N)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        cold = getattr(test, 'cold', test)
+        best = min(timeit.repeat(stmt=lambda: cold(N), number=number, repeat=repeat)) / number
+    except (RecursionError, MemoryError) as exc:
+        return (name, N, None, None, type(exc).__name__)
+    return (name, N, best, peak, None)
+
+def sweep_factorial_implementations(Ns=(10, 100, 1000, 10000, 100000), workers=None):
+    names = [test.__name__ for test in factorial_implementations]
+    points = [(name, N) for N in Ns for name in names]
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(workers, maxtasksperchild=1) as pool:
+        results = pool.starmap(time_factorial_point, points, chunksize=1)
+    curves = {name: [] for name in names}
+    for (name, N, best, peak, error) in results:
+        curves[name].append((N, best, peak, error))
+
+    print('%-20s' % 'secs' + ''.join('%15d' % N for N in Ns))
+    for name in names:
+        print('%-20s' % name + ''.join('%15s' % (error or '%.3g' % best)
+                                       for (N, best, peak, error) in curves[name]))
+    print('%-20s' % 'peak bytes' + ''.join('%15d' % N for N in Ns))
+    for name in names:
+        print('%-20s' % name + ''.join('%15s' % (error or peak)
+                                       for (N, best, peak, error) in curves[name]))
+    return curves
\ No newline at end of file
@@ -26,26 +26,53 @@
 #   self.data + y). Does this make more sense than passing two arguments to add? Would you say 
 #   this makes your classes more “object-oriented”?
 
+# X += Y accumulates into X.val in place where the type allows it, instead of
+#   building a new container per +. The initial value is shared with the
+#   caller, so it is copied once, on the first in-place add (copy-on-write).
+#   Only exact lists (dicts) are extended (updated) in place; anything else
+#   goes through add(), so X += Y always leaves X.val equal to X + Y. An
+#   Adder operand stands for its val, on either operator.
 class Adder:
     def __init__(self, initialval):
         self.val = initialval
+        self.owned = False                 # Is self.val our own copy yet?
     def add(self, x, y):
         raise NotImplementedError('Must be defined in subclass!')
+    def addinplace(self, x, y):            # Default: no in-place form
+        return self.add(x, y)
     def __add__(self, other):
+        if isinstance(other, Adder): other = other.val
         return self.add(self.val, other)
     def __radd__(self, other):
         return self.add(other, self.val)
+    def __iadd__(self, other):
+        if isinstance(other, Adder): other = other.val
+        self.val = self.addinplace(self.val, other)
+        return self
 
 class ListAdder(Adder):
     def add(self, x, y):
         return x + y
+    def addinplace(self, x, y):
+        if type(x) is not list or not isinstance(y, list):
+            return self.add(x, y)
+        if not self.owned:
+            x, self.owned = list(x), True
+        x.extend(y)
+        return x
 
 class DictAdder(Adder):
     def add(self, x, y):
-        result = {}
-        for key in x.keys(): result[key] = x[key]
-        for key in y.keys(): result[key] = y[key]
+        result = dict(x)
+        result.update(y)
         return result
+    def addinplace(self, x, y):
+        if type(x) is not dict:
+            return self.add(x, y)
+        if not self.owned:
+            x, self.owned = dict(x), True
+        x.update(y)
+        return x
 
 
 
@@ -68,25 +95,266 @@ class DictAdder(Adder):
 #          this sort of wrapper class by embedding a real list in a standalone class, or by extending the 
 #          built-in list type with a subclass. Which is easier, and why?
 
+# Zero-copy views for MyList results. A SliceView is a range of offsets
+#   (start, stop, step) into another sequence; a ConcatView is a rope: a
+#   flat list of segments plus their running end offsets. Both support len,
+#   indexing, slicing and iteration without building the result, and
+#   freeze() copies them into a real list (or array) when one is needed.
+from array import array
+from bisect import bisect_right
+from collections.abc import Sequence
+import itertools, operator, sys, weakref
+
+class SliceView(Sequence):
+    def __init__(self, base, offsets):
+        if isinstance(base, SliceView):        # Slice of a slice: compose ranges
+            outer, step = base.offsets, base.offsets.step * offsets.step
+            start = outer.start + offsets.start * outer.step
+            base, offsets = base.base, range(start, start + len(offsets) * step, step)
+        self.base, self.offsets = base, offsets
+    def __len__(self):
+        return len(self.offsets)
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return SliceView(self.base, self.offsets[index])
+        return self.base[self.offsets[index]]
+    def __iter__(self):
+        if isinstance(self.base, ConcatView):
+            return self.base.iterrange(self.offsets)
+        return map(self.base.__getitem__, self.offsets)
+    def freeze(self, typecode=None):
+        return array(typecode, self) if typecode else list(self)
+
+# The segments and ends lists only ever grow, and a ConcatView uses just
+#   the first count entries of them. So a + whose left side is the newest
+#   rope over its lists appends to them in place and shares them with the
+#   result; the left rope still sees only its own prefix. x = x + y in a loop
+#   thus costs time per step for y's segments only, not for all of x's.
+class ConcatView(Sequence):
+    def __init__(self, parts):
+        self.segments, self.ends, self.count = [], [], 0
+        self.join(parts)
+    def join(self, parts):                     # Add parts' segments at the end
+        segments, ends = self.segments, self.ends
+        end = ends[-1] if ends else 0
+        for part in parts:
+            if isinstance(part, ConcatView):
+                part = itertools.islice(part.segments, part.count)
+            else:
+                part = [part]
+            for segment in part:
+                if len(segment):
+                    end += len(segment)
+                    segments.append(segment)
+                    ends.append(end)
+        self.count = len(segments)
+    @classmethod
+    def concat(cls, first, *rest):             # first + rest, sharing first's lists if it can
+        if not (isinstance(first, ConcatView) and first.count == len(first.segments)):
+            return cls((first,) + rest)
+        new = cls.__new__(cls)
+        new.segments, new.ends = first.segments, first.ends
+        new.join(rest)
+        return new
+    def __len__(self):
+        return self.ends[self.count - 1] if self.count else 0
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return SliceView(self, range(len(self))[index])
+        if index < 0: index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('ConcatView index out of range')
+        which = bisect_right(self.ends, index, 0, self.count)
+        return self.segments[which][index - (self.ends[which - 1] if which else 0)]
+    def __iter__(self):
+        return itertools.chain.from_iterable(itertools.islice(self.segments, self.count))
+    def iterrange(self, offsets):
+        # Items at a range of offsets, walking the segments in order rather
+        # than bisecting for each item, unless the range runs backward
+        if offsets.step < 0:
+            return map(self.__getitem__, offsets)
+        return self.walk(offsets.start, offsets.stop, offsets.step)
+    def walk(self, start, stop, step):
+        which = bisect_right(self.ends, start, 0, self.count)
+        while start < stop and which < self.count:
+            low, high = self.ends[which - 1] if which else 0, self.ends[which]
+            segment = self.segments[which]
+            yield from map(segment.__getitem__, range(start - low, min(stop, high) - low, step))
+            if start < high:
+                start += -(-(high - start) // step) * step
+            which += 1
+    def freeze(self, typecode=None):
+        return array(typecode, self) if typecode else list(self)
+
+# Storage is copy-on-write: MyLists made from other MyLists share the
+#   source's buffer instead of copying it, and slicing, + and * return
+#   MyLists over SliceView/ConcatView views of their operands' buffers.
+#   A MyList either owns its buffer, or reads those of its owners; each
+#   owner keeps weak references to the MyLists reading its buffer (its
+#   dependents). An owner about to mutate first has its live dependents
+#   take their own copies (a slice copies just its own items), so the
+#   owner's buffer is never copied, and dead dependents cost nothing. A
+#   MyList that reads others' buffers copies its contents before its own
+#   first mutation; freeze() does the same on request. Passing a typecode
+#   stores homogeneous numeric data in a compact array.array. Every list
+#   method is redefined to use the buffer, since the list this class
+#   inherits from is always left empty.
 class MyList(list):
-    def __init__(self, listval):
-        self.listval = list(listval)           # Copy value to avoid changing mutable object
+    def __init__(self, listval=(), typecode=None):
+        self.typecode = typecode
+        self.owners = ()                       # MyLists whose buffers we read
+        self.dependents = weakref.WeakValueDictionary()  # id: MyList reading our buffer
+        if isinstance(listval, MyList) and listval.typecode == typecode:
+            self.data = listval.data
+            self.share(listval)
+        elif typecode:
+            self.data = array(typecode, listval)
+        else:
+            self.data = list(listval)          # Copy value to avoid changing mutable object
+
+    @classmethod
+    def view(cls, data, typecode=None, sources=()):
+        # A MyList reading through data, a view of the sources' buffers
+        new = MyList.__new__(MyList)
+        new.typecode, new.data = typecode, data
+        new.owners, new.dependents = (), weakref.WeakValueDictionary()
+        new.share(*sources)
+        return new
+
+    def share(self, *sources):                 # Read sources' buffers from now on
+        owners = {}                            # By id: MyLists are unhashable
+        for source in sources:
+            for owner in source.owners or (source,):
+                owners[id(owner)] = owner
+                owner.dependents[id(self)] = self
+        self.owners = tuple(owners.values())
+
+    def buffer(self):                          # For reading
+        return self.data
+    def writable(self):                        # For mutating
+        if self.owners:
+            self.freeze()                      # Others' buffers: copy ours out
+        elif self.dependents:
+            for dependent in list(self.dependents.values()):
+                dependent.freeze()             # Ours: readers copy theirs out
+        return self.data
+    def freeze(self):                          # Own, real list/array from now on
+        data = self.data
+        if isinstance(data, (SliceView, ConcatView)):
+            data = data.freeze(self.typecode)
+        elif self.owners:
+            data = data[:]
+        for owner in self.owners:
+            owner.dependents.pop(id(self), None)
+        self.data, self.owners = data, ()
+        return self
+    def coerce(self, other):                   # other as a buffer like ours
+        if isinstance(other, MyList) and other.typecode == self.typecode:
+            return other.data
+        return array(self.typecode, other) if self.typecode else list(other)
+    def sources(self, other):                  # MyLists read by a view of self and other
+        if isinstance(other, MyList) and other.typecode == self.typecode:
+            return (self, other)
+        return (self,)
+
+    @property
+    def listval(self):
+        return self.data
+
     def __getitem__(self, offset):
-        return self.listval[offset]
+        if isinstance(offset, slice):
+            data = self.data
+            return MyList.view(SliceView(data, range(len(data))[offset]), self.typecode, (self,))
+        return self.data[offset]
+    def __setitem__(self, offset, value):
+        self.writable()[offset] = value
     def __add__(self, other):
-        return MyList(self.listval + other)
+        return MyList.view(ConcatView.concat(self.data, self.coerce(other)),
+                           self.typecode, self.sources(other))
     def __radd__(self, other):
-        return MyList(other + self.listval)
+        return MyList.view(ConcatView([self.coerce(other), self.data]), self.typecode, (self,))
     def __mul__(self, other):
-        return MyList(self.listval * other)
+        return MyList.view(ConcatView([self.data] * other), self.typecode, (self,))
+    __rmul__ = __mul__
     def __len__(self):
-        return len(self.listval)
+        return len(self.data)
+    def __iter__(self):
+        return iter(self.data)
+    def __reversed__(self):
+        return reversed(self.data)
+    def __contains__(self, item):
+        return item in self.data
     def __getslice__(self, low, high):
-        return MyList(self.listval[low:high])
+        return self[low:high]
+    def __sizeof__(self):                      # Counting the buffer only if ours
+        size = list.__sizeof__(self) + sys.getsizeof(self.__dict__)
+        return size + (0 if self.owners else sys.getsizeof(self.data))
+    def __reduce__(self):
+        # For copy and pickle: a new MyList of the same items, which never
+        #   shares the buffer, owners or dependents (list's default would
+        #   append items to a copy that shares our buffer, forever)
+        return (type(self), (list(self.data), self.typecode))
     def __repr__(self):
-        return self.listval.repr()
+        data = self.data
+        if isinstance(data, (SliceView, ConcatView)):
+            data = data.freeze(self.typecode)
+        return repr(data)
+
+    # Comparisons: as lists, against MyLists or lists
+    def compare(self, other, test):
+        if isinstance(other, MyList): other = other.data
+        elif not isinstance(other, list): return NotImplemented
+        return test(aslist(self.data), aslist(other))
+    def __eq__(self, other): return self.compare(other, operator.eq)
+    def __ne__(self, other): return self.compare(other, operator.ne)
+    def __lt__(self, other): return self.compare(other, operator.lt)
+    def __le__(self, other): return self.compare(other, operator.le)
+    def __gt__(self, other): return self.compare(other, operator.gt)
+    def __ge__(self, other): return self.compare(other, operator.ge)
+    __hash__ = None
+
+    # Mutators: all through writable(), so shared buffers are copied first
+    def __delitem__(self, offset):
+        del self.writable()[offset]
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+    def __imul__(self, count):
+        data = self.writable()
+        data *= count
+        return self
     def append(self, node):
-        self.listval.append(node)
+        self.writable().append(node)
+    def extend(self, other):
+        data = self.writable()                 # May detach other from us
+        data.extend(other.data if isinstance(other, MyList) else other)
+    def insert(self, offset, node):
+        self.writable().insert(offset, node)
+    def pop(self, offset=-1):
+        return self.writable().pop(offset)
+    def remove(self, node):
+        self.writable().remove(node)
+    def clear(self):
+        del self.writable()[:]
+    def reverse(self):
+        self.writable().reverse()
+    def sort(self, *, key=None, reverse=False):
+        data = self.writable()
+        if isinstance(data, list):
+            data.sort(key=key, reverse=reverse)
+        else:
+            data[:] = array(self.typecode, sorted(data, key=key, reverse=reverse))
+
+    # Readers
+    def index(self, node, *bounds):
+        return aslist(self.data).index(node, *bounds)
+    def count(self, node):
+        return self.data.count(node)
+    def copy(self):
+        return MyList(self, self.typecode)
+
+def aslist(data):                              # A buffer or view as a list
+    return data if type(data) is list else list(data)
 
 
 
@@ -103,14 +371,80 @@ class MyList(list):
 #   class)? How would you program the other option? (Hint: it depends on which object the count members are 
 #   assigned to: class members are shared by instances, but self members are per-instance data.)
 
+# Instrumentation for MyList operations: instrument(cls) swaps counting
+#   wrappers in for cls's add, getitem/slice, append and mul methods, and
+#   uninstrument(cls) puts the originals back, so a class that isn't
+#   instrumented pays nothing at all. Counts are kept per thread (no locks
+#   on the hot path, no lost updates), only 1 in every sample operations of
+#   each kind is counted (each kind has its own tick, so interleaved kinds
+#   don't alias), and snapshot() adds up all threads' counts, scaled by sample.
+import threading
+from collections import Counter
+
+class OpCounters:
+    def __init__(self, sample=1):
+        self.sample = sample
+        self.local = threading.local()
+        self.threads = []                      # Every thread's Counter
+        self.lock = threading.Lock()
+    def count(self, op):
+        local = self.local
+        try:
+            ticks = local.ticks
+        except AttributeError:
+            ticks = local.ticks = Counter()
+            local.counts = Counter()
+            with self.lock: self.threads.append(local.counts)
+        ticks[op] += 1
+        if ticks[op] % self.sample == 0:
+            local.counts[op] += 1
+    def snapshot(self):                        # {op: estimated count}
+        total = Counter()
+        with self.lock:
+            for counts in self.threads: total.update(counts.copy())
+        return {op: count * self.sample for (op, count) in total.items()}
+    def reset(self):
+        with self.lock:
+            for counts in self.threads: counts.clear()
+
+INSTRUMENTED = {'__add__': 'add', '__radd__': 'add', '__mul__': 'mul',
+                '__getitem__': 'getitem', 'append': 'append'}
+
+def instrument(cls, counters=None):
+    counters = counters or OpCounters()
+    if '_originals' in cls.__dict__: uninstrument(cls)
+    cls._originals = {name: cls.__dict__.get(name) for name in INSTRUMENTED}
+    for (name, op) in INSTRUMENTED.items():
+        setattr(cls, name, counted(getattr(cls, name), op, counters))
+    cls.counters = counters
+    return counters
+
+def counted(method, op, counters):
+    count = counters.count
+    if op == 'getitem':
+        def wrapper(self, offset):
+            count('slice' if isinstance(offset, slice) else 'getitem')
+            return method(self, offset)
+    else:
+        def wrapper(self, *args):
+            count(op)
+            return method(self, *args)
+    wrapper.__name__ = method.__name__
+    return wrapper
+
+def uninstrument(cls):
+    for (name, original) in cls.__dict__.get('_originals', {}).items():
+        if original is None: delattr(cls, name)
+        else: setattr(cls, name, original)
+    if '_originals' in cls.__dict__: del cls._originals
+
+# Counts are per class (shared by all instances), unlike a self member;
+#   MyListSub.counters.snapshot() reads them, and printcounts() prints them
 class MyListSub(MyList):
-    def __init__(self, listval):
-        self.addcount =  0
-        MyList.__init__(self, listval)
-    def __add__(self, other):
-        self.addcount += 1
-        print('Incrementing add counter, new value: %s' % self.addcount)
-        MyList.__add__(self, other)
+    def printcounts(self):
+        print(self.counters.snapshot())
+
+instrument(MyListSub)
 
 
 
@@ -125,13 +459,170 @@ class MyListSub(MyList):
 #   will work in 2.X’s classic classes but not in 3.X’s new-style classes—which are optional in 2.X—for reasons 
 #   noted in Chapter 28, Chapter 31, and Chapter 32, and summarized in the solution to this exercise.)
 
-# Note: this code only works for 2.X, since all methods will use '__getattr__' and '__setattr__'.
-#   In 3.X, we must override each individual method.
-class Attrs:
-    def __getattr__(self, name):
-        print('getattr: %s' % name)
+# Traced wraps any object and records attribute fetches, assignments and
+#   deletions, plus operator calls, in a bounded ring buffer (a deque) rather
+#   than printing them; Traced.trace(proxy) returns the recorded events.
+#   Fetches of non-data descriptors found on the class (plain methods, for
+#   one) are cached as bound methods, so hot method calls skip the lookup;
+#   assignments or deletions through the proxy invalidate the cache. Changes
+#   made to the wrapped object directly (o.m = f, or to its class) aren't
+#   seen by the proxy: call Traced.flush(proxy) after them, or the cached
+#   method is still returned.
+#
+# Note: __getattr__ alone can't intercept operators in 3.X, since built-in
+#   operations look special methods up on the class, not the instance. So
+#   each one is defined on Traced explicitly, forwarding to the wrapped object.
+from collections import deque
+from types import SimpleNamespace
+import math
+
+class Traced:
+    def __init__(self, wrapped, size=1024):
+        object.__setattr__(self, '_Traced__wrapped', wrapped)
+        object.__setattr__(self, '_Traced__trace', deque(maxlen=size))
+        object.__setattr__(self, '_Traced__cache', {})
+
+    # Every attribute fetch comes here (__getattr__ would only see the ones
+    #   normal lookup misses, after an internal AttributeError, and that's
+    #   slower); the proxy's own state is read with object.__getattribute__
+    def __getattribute__(self, name):
+        state = object.__getattribute__
+        state(self, '_Traced__trace').append(('get', name))
+        cache = state(self, '_Traced__cache')
+        if name in cache:
+            return cache[name]
+        wrapped = state(self, '_Traced__wrapped')
+        value = getattr(wrapped, name)
+        if cacheable(wrapped, name):
+            cache[name] = value
+        return value
     def __setattr__(self, name, value):
-        print('setattr: Name: %s, Value: %s' % (name, value))
+        state = object.__getattribute__
+        state(self, '_Traced__trace').append(('set', name, value))
+        state(self, '_Traced__cache').pop(name, None)
+        setattr(state(self, '_Traced__wrapped'), name, value)
+    def __delattr__(self, name):
+        state = object.__getattribute__
+        state(self, '_Traced__trace').append(('del', name))
+        state(self, '_Traced__cache').pop(name, None)
+        delattr(state(self, '_Traced__wrapped'), name)
+    def __repr__(self):
+        return '<Traced %r>' % (object.__getattribute__(self, '_Traced__wrapped'),)
+
+    @staticmethod
+    def trace(proxy):                          # Recorded events, oldest first
+        return list(object.__getattribute__(proxy, '_Traced__trace'))
+    @staticmethod
+    def flush(proxy):                          # Drop cached lookups
+        object.__getattribute__(proxy, '_Traced__cache').clear()
+
+# True if getattr(obj, name) resolves to a non-data descriptor on obj's class
+#   that no instance attribute shadows, so its bound result can be reused
+def cacheable(obj, name):
+    if name in getattr(obj, '__dict__', {}): return False
+    for klass in type(obj).__mro__:
+        if name in klass.__dict__:
+            kind = type(klass.__dict__[name])
+            return (hasattr(kind, '__get__') and
+                    not hasattr(kind, '__set__') and not hasattr(kind, '__delete__'))
+    return False
+
+# Special methods forwarded by Traced: those with a matching built-in go
+#   through it (so len(), iter(), bool() etc. keep their fallbacks), and the
+#   rest are looked up on the wrapped object's class, as the interpreter does.
+#   A missing reflected method (list has no __radd__, say) retries the whole
+#   operation on the unwrapped object, so [0] + Traced([1]) still works;
+#   other missing operators return NotImplemented, and a missing __enter__
+#   or __exit__ raises TypeError, as a with on the wrapped object would (so
+#   a proxy never turns a non-context manager into one that swallows
+#   exceptions). Traced arguments are
+#   unwrapped first, so proxies combine like the objects they wrap. In-place
+#   operators go through the operator module (which falls back on the plain
+#   operator) and return the proxy itself when the wrapped object was
+#   changed in place, so p += x keeps p a proxy of the same object.
+BUILTINS = {
+    '__len__': len, '__iter__': iter, '__next__': next, '__bool__': bool,
+    '__str__': str, '__hash__': hash, '__int__': int, '__float__': float,
+    '__complex__': complex, '__bytes__': bytes, '__format__': format,
+    '__index__': operator.index, '__abs__': abs, '__neg__': operator.neg,
+    '__pos__': operator.pos, '__invert__': operator.invert,
+    '__round__': round, '__trunc__': math.trunc, '__floor__': math.floor,
+    '__ceil__': math.ceil, '__reversed__': reversed,
+    '__divmod__': divmod, '__rdivmod__': lambda obj, other: divmod(other, obj),
+    '__contains__': operator.contains, '__getitem__': operator.getitem,
+    '__setitem__': operator.setitem, '__delitem__': operator.delitem,
+    '__call__': lambda obj, *pargs, **kargs: obj(*pargs, **kargs)}
+
+def protocol(name, message):                   # type(obj).name run on obj, or TypeError
+    def call(obj, *pargs):
+        impl = getattr(type(obj), name, None)
+        if impl is None:
+            raise TypeError(message % type(obj).__name__)
+        return impl(obj, *pargs)
+    return call
+
+for name in ('__enter__', '__exit__'):
+    BUILTINS[name] = protocol(name, "'%s' object does not support the context manager protocol")
+
+INPLACE = ('iadd isub imul imatmul itruediv ifloordiv imod ipow ilshift irshift '
+           'iand ixor ior').split()
+OPERATORS = ('add sub mul matmul truediv floordiv mod pow lshift rshift and xor or '
+             'radd rsub rmul rmatmul rtruediv rfloordiv rmod rpow rlshift rrshift rand rxor ror '
+             'eq ne lt le gt ge').split()
+
+def forwarder(name, builtin=None, inplace=False):
+    def method(self, *pargs, **kargs):
+        wrapped = object.__getattribute__(self, '_Traced__wrapped')
+        object.__getattribute__(self, '_Traced__trace').append(('op', name))
+        if pargs: pargs = tuple(map(unwrap, pargs))
+        if inplace:
+            result = builtin(wrapped, *pargs)
+            return self if result is wrapped else result
+        if builtin is not None:
+            return builtin(wrapped, *pargs, **kargs)
+        impl = getattr(type(wrapped), name, None)
+        if impl is not None:
+            return impl(wrapped, *pargs, **kargs)
+        if name[2:-2] in REFLECTED:
+            return REFLECTED[name[2:-2]](pargs[0], wrapped)
+        return NotImplemented
+    method.__name__ = name
+    return method
+
+def unwrap(obj):                               # The object a proxy wraps
+    if isinstance(obj, Traced):
+        return object.__getattribute__(obj, '_Traced__wrapped')
+    return obj
+
+REFLECTED = {'r' + name: getattr(operator, name if hasattr(operator, name) else name + '_')
+             for name in OPERATORS if name in
+             'add sub mul matmul truediv floordiv mod pow lshift rshift and xor or'.split()}
+
+for (name, builtin) in BUILTINS.items():
+    setattr(Traced, name, forwarder(name, builtin))
+for name in OPERATORS:
+    setattr(Traced, '__%s__' % name, forwarder('__%s__' % name))
+for name in INPLACE:
+    setattr(Traced, '__%s__' % name, forwarder('__%s__' % name, getattr(operator, name), True))
+
+# The exercise's Attrs: a Traced empty namespace
+class Attrs(Traced):
+    def __init__(self, wrapped=None, size=1024):
+        Traced.__init__(self, SimpleNamespace() if wrapped is None else wrapped, size)
+
+def test_traced():
+    # A with on a proxy of a non-context manager must raise, like one on the
+    #   object itself, and never run (and swallow errors from) its block
+    try:
+        with Traced(5):
+            raise ValueError('block ran')
+    except TypeError as exc:
+        print('TypeError:', exc)
+    else:
+        raise AssertionError('with Traced(5) ran its block')
+    with Traced(open(__file__)) as file:
+        print(file.readline().rstrip())
+    print(Traced.trace(Attrs()), Traced(3) + Traced(4), f'{Traced(3.14159):.2f}')
 
 
 
@@ -183,23 +674,44 @@ def exercise5a():
      print(set3 | set4)
 
 class SetWithMultiples(Set):
+    def operands(self, others, subject=True):
+        # Sized operands are ordered by len() as they are; one-shot iterables
+        #   (generators, files) are read into a Set once so they can be both
+        #   measured and probed. subject=False leaves self out of the list.
+        views = [self] if subject else []
+        for other in others:
+            if not hasattr(other, '__len__'): other = Set(other)
+            views.append(other)
+        return sorted(views, key=len)
+
     def intersect(self, *others):
-        res = []
-        for item in self.data:
-            for set in list(others): 
-                if not item in set: break
-            else:
-                res.append(item)
-        return Set(res)
+        # Probe the smallest operand against hashed views of the rest, in size
+        #   order, stopping as soon as nothing is left; the survivors are then
+        #   put back in self's order, whatever order the smallest operand had
+        views = self.operands(others)
+        res = views[0]
+        for other in views[1:]:
+            if not res: break
+            res = Set.within(res, Set.hashed(other))
+        if res is self or not res: return Set(res)
+        res = Set(res)
+        return Set([item for item in self.data if item in res])
 
     def union(self, *others):
-        res = list(self.data)
-        for set in others:
-            for item in list(set):
-                if not item in res:
-                    res.append(item)
+        res = Set(self.data)
+        for other in others: res.concat(other)
+        return res
+
+    def difference(self, *others):
+        # Largest operands first, since they are likely to remove the most
+        res = self.data
+        for other in reversed(self.operands(others, subject=False)):
+            if not res: break
+            res = Set.within(res, Set.hashed(other), inside=False)
         return Set(res)
 
+    def __sub__(self, other): return self.difference(other)
+
 def exercise5b():
     S1 = {'a', 'b', 'c'}
     S2 = {'c', 'd', 'e'}
@@ -209,6 +721,8 @@ def exercise5b():
     print('Union', u)
     i = setwithmults.intersect(S2, S3)
     print('Intersection', i)
+    d = setwithmults.difference(S2, (c for c in 'ghb'))
+    print('Difference', d)
 
 
 
@@ -276,8 +790,8 @@ def exercise6():
 
 class Lunch:
     def __init__(self):
-        self.customer = Customer()
-        self.employee = Employee()
+        self.customer = self.Customer()
+        self.employee = self.Employee()
     def order(self, foodName):
         self.customer.placeOrder(foodName, self.employee)
     def result(self):
@@ -299,8 +813,69 @@ class Food:
     def __init__(self, name):
         self.name = name
 
-def exercise7():
-    lunch = Lunch()
+# Bound here, since Exercise 9 reuses the global name Customer
+Lunch.Customer, Lunch.Employee = Customer, Employee
+
+# Compact mode, for simulating many orders: every class uses __slots__, so
+#   instances carry no __dict__; CompactFood is a flyweight, one interned
+#   instance per name, numbered in order of first use; and a customer's
+#   order history is a column of those numbers in an array, not a list of
+#   objects. orderMany() places a whole batch of orders at once.
+class CompactLunch:
+    __slots__ = ('customer', 'employee')
+    def __init__(self):
+        self.customer = CompactCustomer()
+        self.employee = CompactEmployee()
+    def order(self, foodName):
+        self.customer.placeOrder(foodName, self.employee)
+    def orderMany(self, foodNames):
+        self.customer.placeOrders(foodNames, self.employee)
+    def result(self):
+        self.customer.printFood()
+
+class CompactCustomer:
+    __slots__ = ('orders',)
+    def __init__(self):
+        self.orders = array('I')               # CompactFood ids, oldest first
+    def placeOrder(self, foodName, employee):
+        self.orders.append(employee.takeOrder(foodName).id)
+    def placeOrders(self, foodNames, employee):
+        interned = CompactFood.interned
+        self.orders.extend([(interned.get(name) or employee.takeOrder(name)).id
+                            for name in foodNames])
+    @property
+    def food(self):                            # Latest order, as in Customer
+        return CompactFood.menu[self.orders[-1]] if self.orders else None
+    def history(self):
+        return map(CompactFood.menu.__getitem__, self.orders)
+    def tally(self):                           # {food name: times ordered}
+        menu = CompactFood.menu
+        return {menu[id].name: count for (id, count) in Counter(self.orders).items()}
+    def printFood(self):
+        print(self.food.name)
+
+class CompactEmployee:
+    __slots__ = ()
+    def takeOrder(self, foodName):
+        return CompactFood(foodName)
+
+class CompactFood:
+    __slots__ = ('name', 'id')
+    interned = {}                              # name -> CompactFood
+    menu = []                                  # id -> CompactFood
+    def __new__(cls, name):
+        food = cls.interned.get(name)
+        if food is None:
+            food = object.__new__(cls)
+            food.name, food.id = name, len(cls.menu)
+            cls.interned[name] = food
+            cls.menu.append(food)
+        return food
+    def __repr__(self):
+        return '<CompactFood %r>' % self.name
+
+def exercise7(compact=False):
+    lunch = CompactLunch() if compact else Lunch()
     lunch.order('hamburger')
     lunch.order('hot dog')
     print(lunch.result())
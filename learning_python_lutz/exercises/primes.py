@@ -0,0 +1,104 @@
+from itertools import compress
+from math import gcd, isqrt
+
+SEGMENT = 1 << 18              # Numbers sieved per segment by primes_in()
+SIEVE_LIMIT = 1 << 24          # classify() sieves up to this, tests above it
+
+# Deterministic Miller-Rabin witnesses for every n < 3.3 * 10**24; above
+#   that bound, a composite passing all of them is still vanishingly unlikely
+WITNESSES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+
+# flags[i] is 1 if i is prime, for 0 <= i < limit
+def sieve(limit):
+    flags = bytearray([1]) * limit
+    flags[:2] = bytes(min(2, limit))
+    for i in range(2, isqrt(max(limit - 1, 0)) + 1):
+        if flags[i]:
+            flags[i * i::i] = bytes(len(range(i * i, limit, i)))
+    return flags
+
+def small_primes(limit):
+    return list(compress(range(limit), sieve(limit)))
+
+SMALL_PRIMES = small_primes(1000)
+
+
+# Primes in [low, high), sieved one bytearray segment at a time so memory
+# stays bounded by the segment size and the base primes up to sqrt(high)
+def primes_in(low, high, segment=SEGMENT):
+    base = small_primes(isqrt(max(high - 1, 0)) + 1)
+    for start in range(max(low, 2), high, segment):
+        stop = min(start + segment, high)
+        flags = bytearray([1]) * (stop - start)
+        for p in base:
+            if p * p >= stop: break
+            first = max(p * p, (start + p - 1) // p * p)
+            flags[first - start::p] = bytes(len(range(first, stop, p)))
+        yield from compress(range(start, stop), flags)
+
+
+def is_prime(n):
+    if n < 2: return False
+    for p in WITNESSES:
+        if n % p == 0: return n == p
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d, s = d // 2, s + 1
+    for a in WITNESSES:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1: continue
+        for i in range(s - 1):
+            x = x * x % n
+            if x == n - 1: break
+        else:
+            return False
+    return True
+
+
+# Smallest prime factor of n >= 2 (n itself if prime): trial division by
+# the base primes given, then Miller-Rabin, then Pollard's rho for the rest
+def smallest_factor(n, base=None):
+    base = base or SMALL_PRIMES
+    for p in base:
+        if p * p > n: return n
+        if n % p == 0: return p
+    return min(prime_factors(n))
+
+def prime_factors(n):
+    if n == 1: return []
+    if is_prime(n): return [n]
+    d = rho(n)
+    return prime_factors(d) + prime_factors(n // d)
+
+def rho(n):                    # Some nontrivial factor of composite n
+    if n % 2 == 0: return 2
+    for c in range(1, n):
+        x = y = 2
+        d = 1
+        while d == 1:
+            x = (x * x + c) % n
+            y = (y * y + c) % n
+            y = (y * y + c) % n
+            d = gcd(abs(x - y), n)
+        if d != n: return d
+
+
+# [(n, smallest prime factor)] for every n in numbers, with n itself as the
+# factor when n is prime and None when n < 2. Primes up to the largest n are
+# sieved once when that fits in SIEVE_LIMIT bytes; composites are factored
+# with the primes up to its square root.
+def classify(numbers):
+    numbers = list(numbers)
+    top = max((n for n in numbers if n >= 2), default=0)
+    flags = sieve(top + 1) if top < SIEVE_LIMIT else None
+    base = small_primes(min(isqrt(top), 1 << 16) + 1)
+    results = []
+    for n in numbers:
+        if n < 2:
+            results.append((n, None))
+        elif flags[n] if flags is not None else is_prime(n):
+            results.append((n, n))
+        else:
+            results.append((n, smallest_factor(n, base)))
+    return results
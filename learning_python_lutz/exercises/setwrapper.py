@@ -1,28 +1,56 @@
 class Set:
    def __init__(self, value = []):    # Constructor
-       self.data = []                 # Manages a list
+       self.data = []                 # Manages a list, in insertion order
+       self.index = set()             # Hashed view of data, for fast lookups
        self.concat(value)
 
    def intersect(self, other):        # other is any sequence
-       res = []                       # self is the subject
-       for x in self.data:
-           if x in other:             # Pick common items
-               res.append(x)
-       return Set(res)                # Return a new Set
+       other = self.hashed(other)     # Probe a hashed view, not a scan
+       return Set(self.within(self.data, other))   # Common items, in a new Set
    def union(self, other):            # other is any sequence
-       res = self.data[:]             # Copy of my list
-       for x in other:                # Add items in other
-           if not x in res:
-               res.append(x)
-       return Set(res)
+       res = Set(self.data)           # Copy of my list and index
+       res.concat(other)              # Add items in other
+       return res
    def concat(self, value):           # value: list, Set...
        for x in value:                # Removes duplicates
-          if not x in self.data:
-               self.data.append(x)
+           if not x in self:
+               self.add(x)
+   def add(self, x):                  # Assumes x is not a member yet
+       try:
+           self.index.add(x)
+       except TypeError:              # Unhashable: kept in data only
+           pass
+       self.data.append(x)
 
+   @staticmethod
+   def hashed(other):                 # other itself if it has fast "in",
+       if isinstance(other, (Set, set, frozenset, dict, range)):
+           return other
+       return Set(other)              # else a Set built in one pass
+
+   @staticmethod
+   def within(items, other, inside=True):       # items in (or not in) other,
+       try:                                     #   a hashed() view
+           if inside: return [x for x in items if x in other]
+           return [x for x in items if x not in other]
+       except TypeError:                        # Unhashable item, builtin set:
+           return [x for x in items if Set.member(x, other) == inside]
+
+   @staticmethod
+   def member(x, other):
+       try:
+           return x in other
+       except TypeError:              # Unhashable x can't be in a hashed container
+           return False
+
+   def __contains__(self, x):                                   # x in self
+       try:
+           return x in self.index
+       except TypeError:                                        # Unhashable x:
+           return x in self.data                                # ordered scan
    def __len__(self):          return len(self.data)            # len(self), if self
    def __getitem__(self, key): return self.data[key]            # self[i], self[i:j]
    def __and__(self, other):   return self.intersect(other)     # self & other
    def __or__(self, other):    return self.union(other)         # self | other
    def __repr__(self):         return 'Set:' + repr(self.data)  # print(self),...
-   def __iter__(self):         return iter(self.data)           # for x in self,...
\ No newline at end of file
+   def __iter__(self):         return iter(self.data)           # for x in self,...
@@ -0,0 +1,146 @@
+# Local store for benchmark runs, with regression checks between runs.
+#
+# Each run records a suite name, an optional label, the interpreter and
+# machine it ran on, and the full per-call timing distribution of every
+# benchmark in it. compare() flags benchmarks whose times got significantly
+# slower than a baseline run (Mann-Whitney U test, plus a minimum change in
+# median so that tiny but consistent shifts aren't reported).
+#
+#     python benchstore.py list suite
+#     python benchstore.py compare suite [--baseline RUN] [--run RUN]
+
+import sqlite3, json, math, os, platform, statistics, sys, time
+
+DBFILE = os.path.join(os.path.expanduser('~'), '.benchstore.db')
+
+SCHEMA = """
+create table if not exists runs (
+    id integer primary key, suite text, label text, started real,
+    python text, implementation text, machine text);
+create table if not exists results (
+    run integer references runs(id), name text, number integer, times text);
+"""
+
+# Open (and create if needed) a store
+def connect(db=DBFILE):
+    conn = sqlite3.connect(db)
+    conn.executescript(SCHEMA)
+    return conn
+
+def machine():
+    return dict(platform=platform.platform(), machine=platform.machine(),
+                processor=platform.processor(), cpus=os.cpu_count(),
+                node=platform.node())
+
+# Save one run of a suite; results are timer.Result objects or
+# (name, per-call times, calls per timing) tuples. Returns the run id.
+def record(suite, results, label=None, db=DBFILE):
+    with connect(db) as conn:
+        cursor = conn.execute(
+            'insert into runs (suite, label, started, python, implementation, machine) '
+            'values (?, ?, ?, ?, ?, ?)',
+            (suite, label, time.time(), sys.version, platform.python_implementation(),
+             json.dumps(machine())))
+        runid = cursor.lastrowid
+        for result in results:
+            if not isinstance(result, tuple):
+                result = (result.name, result.times, result.number)
+            (name, times, number) = result
+            conn.execute('insert into results values (?, ?, ?, ?)',
+                         (runid, name, number, json.dumps(list(times))))
+    return runid
+
+# [(id, label, started, python)] for a suite, oldest first
+def runs(suite, db=DBFILE):
+    with connect(db) as conn:
+        return conn.execute('select id, label, started, python from runs '
+                            'where suite = ? order by id', (suite,)).fetchall()
+
+# {name: per-call times} for one run
+def load(runid, db=DBFILE):
+    with connect(db) as conn:
+        rows = conn.execute('select name, times from results where run = ?', (runid,))
+        return {name: json.loads(times) for (name, times) in rows}
+
+# Run id from an id, a label, or None for the latest run (skip=1: the one before)
+def resolve(suite, run=None, skip=0, db=DBFILE):
+    ids = [runid for (runid, label, started, python) in runs(suite, db)
+           if run is None or str(runid) == str(run) or label == run]
+    if len(ids) <= skip:
+        raise LookupError('no run %r for suite %r' % (run, suite))
+    return ids[-1 - skip]
+
+# Two-sided p-value that samples a and b come from the same distribution
+# (Mann-Whitney U, normal approximation with tie correction)
+def mannwhitney(a, b):
+    n1, n2 = len(a), len(b)
+    ranked = sorted([(x, 0) for x in a] + [(x, 1) for x in b])
+    ranks, ties, i = [0.0] * len(ranked), 0, 0
+    while i < len(ranked):
+        j = i
+        while j + 1 < len(ranked) and ranked[j + 1][0] == ranked[i][0]: j += 1
+        for k in range(i, j + 1): ranks[k] = (i + j) / 2 + 1
+        ties += (j - i + 1) ** 3 - (j - i + 1)
+        i = j + 1
+    u = sum(r for (r, (x, group)) in zip(ranks, ranked) if group == 0) - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1))))
+    if sigma == 0: return 1.0
+    z = (abs(u - n1 * n2 / 2) - 0.5) / sigma
+    return min(1.0, math.erfc(max(z, 0) / math.sqrt(2)))
+
+# Compare a run against a baseline (default: the latest run against the one
+# before it). Returns [(name, base median, median, change, p, status)], where
+# status is 'slower', 'faster', 'same', 'new' or 'gone'.
+def compare(suite, baseline=None, run=None, alpha=0.05, threshold=0.05, db=DBFILE):
+    runid = resolve(suite, run, db=db)
+    baseid = resolve(suite, baseline, skip=0 if baseline else 1, db=db)
+    base, current = load(baseid, db), load(runid, db)
+    rows = []
+    for name in list(base) + [name for name in current if name not in base]:
+        if name not in current or name not in base:
+            times = current.get(name) or base[name]
+            rows.append((name, None, statistics.median(times), None, None,
+                         'new' if name in current else 'gone'))
+            continue
+        old, new = statistics.median(base[name]), statistics.median(current[name])
+        change = (new - old) / old if old else 0.0
+        p = mannwhitney(base[name], current[name])
+        status = 'same'
+        if p < alpha and abs(change) >= threshold:
+            status = 'slower' if change > 0 else 'faster'
+        rows.append((name, old, new, change, p, status))
+    return rows
+
+def report(rows):
+    for (name, old, new, change, p, status) in rows:
+        if old is None:
+            print('%-24s %12s %12.4g %8s %7s  %s' % (name, '', new, '', '', status))
+        else:
+            print('%-24s %12.4g %12.4g %+7.1f%% %7.3f  %s' %
+                  (name, old, new, change * 100, p, status.upper() if status == 'slower' else status))
+    return sum(1 for row in rows if row[-1] == 'slower')
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Benchmark result store')
+    parser.add_argument('--db', default=DBFILE)
+    commands = parser.add_subparsers(dest='command', required=True)
+    listing = commands.add_parser('list', help='show stored runs')
+    listing.add_argument('suite')
+    comparing = commands.add_parser('compare', help='flag regressions against a baseline')
+    comparing.add_argument('suite')
+    comparing.add_argument('--baseline', help='run id or label, default the previous run')
+    comparing.add_argument('--run', help='run id or label, default the latest run')
+    comparing.add_argument('--alpha', type=float, default=0.05)
+    comparing.add_argument('--threshold', type=float, default=0.05,
+                           help='minimum relative change in median to flag')
+    args = parser.parse_args()
+    if args.command == 'list':
+        for (runid, label, started, python) in runs(args.suite, args.db):
+            print('%4d  %-12s %s  %s' % (runid, label or '',
+                  time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(started)),
+                  python.split()[0]))
+    else:
+        rows = compare(args.suite, args.baseline, args.run, args.alpha, args.threshold, args.db)
+        sys.exit(1 if report(rows) else 0)
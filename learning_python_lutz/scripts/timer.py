@@ -1,27 +1,147 @@
-import time, sys
-timer = time.time
+import time, sys, statistics, gc, tracemalloc
+timer = time.perf_counter_ns          # Monotonic, nanosecond resolution
+
+# Run func() reps times in one timed batch
+# Returns (elapsed nanoseconds, last result)
+def batch(reps, func, pargs=(), kargs={}):
+    ret = None
+    start = timer()
+    for i in range(reps):
+        ret = func(*pargs, **kargs)
+    return (timer() - start, ret)
+
+# Inner reps needed for one batch of func() to take at least target seconds
+def calibrate(func, *pargs, _target=0.2, **kargs):
+    number = 1
+    while True:
+        elapsed = batch(number, func, pargs, kargs)[0]
+        if elapsed >= _target * 1e9 or number >= 2 ** 30:
+            return number
+        # Grow toward the target, at most 10X per step to resist noisy batches
+        number = int(number * min(10, max(2, _target * 1e9 / max(elapsed, 1))))
+
+# Timing distribution of func(): warmup batches, then repeat timed batches of
+# number calls each (calibrated to target seconds if number is None)
+# Returns a Result of per-call times in seconds; with _memory=True, its
+# memory attribute is an allocation profile from separate, untimed calls
+def bench(func, *pargs, _repeat=5, _number=None, _warmup=1, _target=0.2,
+          _memory=False, **kargs):
+    if _number is None:
+        _number = calibrate(func, *pargs, _target=_target, **kargs)
+    for i in range(_warmup):
+        batch(_number, func, pargs, kargs)
+    times = []
+    for i in range(_repeat):
+        (elapsed, ret) = batch(_number, func, pargs, kargs)
+        times.append(elapsed / 1e9 / _number)
+    result = Result(times, _number, ret, getattr(func, '__name__', repr(func)))
+    if _memory:
+        result.memory = allocations(func, *pargs, _reps=min(_number, 100), **kargs)
+    return result
+
+# Allocation profile of reps func() calls, traced apart from any timing
+# since tracemalloc slows every allocation down: the highest traced peak of
+# one call; how much of that peak was transient, freed again before the call
+# returned (intermediate objects, regrown buffers, frames); the blocks still
+# alive when it returns (its result, and anything else it kept), averaged
+# over the calls; and GC collections started per generation during the calls.
+# CPython keeps no count of blocks allocated and freed again, so transient
+# use is reported in bytes.
+def allocations(func, *pargs, _reps=1, **kargs):
+    collections = [0, 0, 0]
+    calling = [False]
+    def collected(phase, info):
+        if phase == 'start' and calling[0]: collections[info['generation']] += 1
+    own = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    tracing = tracemalloc.is_tracing()
+    if not tracing: tracemalloc.start()
+    gc.callbacks.append(collected)
+    try:
+        tracemalloc.take_snapshot().filter_traces(own)     # Compile the filter
+        peak, transient, kept, ret = 0, 0, 0, None
+        for i in range(_reps):
+            ret = None                     # Free the last result first
+            before = tracemalloc.take_snapshot().filter_traces(own)
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            calling[0] = True
+            ret = func(*pargs, **kargs)
+            calling[0] = False
+            callpeak = tracemalloc.get_traced_memory()[1] - current
+            after = tracemalloc.take_snapshot().filter_traces(own)
+            stats = after.compare_to(before, 'filename')
+            kept += sum(stat.count_diff for stat in stats)
+            peak = max(peak, callpeak)
+            retained = max(0, sum(stat.size_diff for stat in stats))
+            transient = max(transient, callpeak - retained)
+    finally:
+        calling[0] = False
+        gc.callbacks.remove(collected)
+        if not tracing: tracemalloc.stop()
+    return Allocations(peak, transient, kept / _reps, collections, _reps)
+
+class Allocations:
+    def __init__(self, peak, transient, kept, collections, calls):
+        self.peak        = peak            # Bytes, highest of any one call
+        self.transient   = transient       # Bytes of a peak freed by return, highest
+        self.kept        = kept            # Blocks outliving a call, on average
+        self.collections = collections     # GC runs per generation, all calls
+        self.calls       = calls
+    @property
+    def gcpercall(self):
+        return sum(self.collections) / self.calls
+    def __repr__(self):
+        return ('peak %d bytes (%d transient), %.1f blocks kept, '
+                '%.3g collections per call %s' %
+                (self.peak, self.transient, self.kept, self.gcpercall, self.collections))
+
+class Result:
+    def __init__(self, times, number, result=None, name=''):
+        self.times  = times                # Per-call seconds, one per batch
+        self.number = number               # Calls per batch
+        self.result = result               # Last return value of func()
+        self.name   = name
+        self.memory = None                 # Allocations, if profiled
+    @property
+    def min(self):    return min(self.times)
+    @property
+    def max(self):    return max(self.times)
+    @property
+    def mean(self):   return statistics.fmean(self.times)
+    @property
+    def median(self): return statistics.median(self.times)
+    @property
+    def stdev(self):
+        return statistics.stdev(self.times) if len(self.times) > 1 else 0.0
+    def percentile(self, p):               # Linear interpolation, p in 0..100
+        times = sorted(self.times)
+        pos = (len(times) - 1) * p / 100
+        low = int(pos)
+        high = min(low + 1, len(times) - 1)
+        return times[low] + (times[high] - times[low]) * (pos - low)
+    def outliers(self, k=1.5):             # Times beyond Tukey's IQR fences
+        q1, q3 = self.percentile(25), self.percentile(75)
+        low, high = q1 - k * (q3 - q1), q3 + k * (q3 - q1)
+        return [t for t in self.times if t < low or t > high]
+    def __repr__(self):
+        text = ('%s: min %.3g, median %.3g, mean %.3g, stdev %.3g secs '
+                '(%d x %d calls, %d outliers)' %
+                (self.name, self.min, self.median, self.mean, self.stdev,
+                 len(self.times), self.number, len(self.outliers())))
+        return text + ('; %s' % self.memory if self.memory else '')
 
 # Total time to run func() reps times
 # Returns (total time, last result)
 def total(reps, func, *pargs, **kargs):
-    repslist = list(range(reps))
-    start = timer()
-    for i in repslist:
-        ret = func(*pargs, **kargs)
-    elapsed = timer() - start
-    return (elapsed, ret)
+    (elapsed, ret) = batch(reps, func, pargs, kargs)
+    return (elapsed / 1e9, ret)
 
 # Quickest func() among reps runs
 # Returns (best time, last result)
 def bestof(reps, func, *pargs, **kargs):
-    best = 2 ** 32
-    for i in range(reps):
-        start = timer()
-        ret = func(*pargs, **kargs)
-        elapsed = timer() - start
-        if elapsed < best: best = elapsed
-    return (best, ret)
+    result = bench(func, *pargs, _repeat=reps, _number=1, _warmup=0, **kargs)
+    return (result.min, result.result)
 
 # Best of reps1 runs of (total of reps2 runs of func)
 def bestoftotal(reps1, reps2, func, *pargs, **kargs):
-    return bestof(reps1, total, reps2, func, *pargs, **kargs)
\ No newline at end of file
+    return bestof(reps1, total, reps2, func, *pargs, **kargs)
@@ -1,4 +1,5 @@
-import sys, timer
+import sys, os, math, timer
+import multiprocessing, tracemalloc
 reps = 10000
 repslist = list(range(reps))
 
@@ -23,8 +24,153 @@ def genFunc():
             yield abs(x)
     return list(gen())
 
-print(sys.version)
-for test in (forLoop, listComp, mapCall, genExpr, genFunc):
-    (bestof, (total, result)) = timer.bestoftotal(5, 1000, test)
-    print ('%-9s: %.5f => [%s...%s]' %
-       (test.__name__, bestof, result[0], result[-1]))
\ No newline at end of file
+tests = (forLoop, listComp, mapCall, genExpr, genFunc)
+
+# Time one candidate, by name so it can be sent to a worker process
+# Returns (name, best total of 1000 calls, first result item, last result
+# item, timer.Result without the result list)
+def runone(name, cpu=None, memory=False):
+    if cpu is not None and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {cpu})
+    stats = timer.bench(globals()[name], _repeat=5, _number=1000, _warmup=0, _memory=memory)
+    result, stats.result = stats.result, None
+    return (name, stats.min * stats.number, result[0], result[-1], stats)
+
+# Run each candidate in its own freshly spawned interpreter, so GC state and
+# cache warmth don't carry over; workers > 1 runs candidates concurrently,
+# and pin puts each one on its own CPU (round robin) where supported
+def isolated(names=None, workers=1, pin=False, memory=False):
+    names = names or [test.__name__ for test in tests]
+    cpus = sorted(os.sched_getaffinity(0)) if pin and hasattr(os, 'sched_getaffinity') else None
+    jobs = [(name, cpus[i % len(cpus)] if cpus else None, memory)
+            for (i, name) in enumerate(names)]
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(workers, maxtasksperchild=1) as pool:
+        return pool.starmap(runone, jobs, chunksize=1)
+
+# One comparison table for all candidates, relative to the quickest
+def report(results):
+    print(sys.version)
+    fastest = min(bestof for (name, bestof, first, last, stats) in results)
+    for (name, bestof, first, last, stats) in results:
+        print ('%-9s: %.5f (%.2fX) => [%s...%s]' %
+           (name, bestof, bestof / fastest, first, last))
+        if stats.memory:
+            print ('%-9s  %s' % ('', stats.memory))
+
+# Every candidate at each input size in a geometric range, from low up to
+# high (inclusive) by factor. Returns {name: [(size, best secs, peak bytes,
+# median secs)]}
+def sweep(low=100, high=10 ** 6, factor=10, names=None, target=0.05, repeat=7):
+    global repslist
+    names = names or [test.__name__ for test in tests]
+    sizes, size = [], low
+    while size <= high:
+        sizes.append(size)
+        size *= factor
+    curves = {name: [] for name in names}
+    try:
+        for size in sizes:
+            repslist = list(range(size))
+            for name in names:
+                stats = timer.bench(globals()[name], _repeat=repeat, _warmup=0, _target=target)
+                stats.result = None
+                tracemalloc.start()
+                globals()[name]()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                curves[name].append((size, stats.min, peak, stats.median))
+    finally:
+        repslist = list(range(reps))
+    return curves
+
+# Empirical complexity of one curve: the exponent k in time ~ size ** k
+# (least squares over log-log points), and time and peak memory per element
+# at the largest size
+def fit(curve):
+    xs = [math.log(size) for (size, secs, peak, median) in curve]
+    ys = [math.log(secs) for (size, secs, peak, median) in curve]
+    meanx, meany = sum(xs) / len(xs), sum(ys) / len(ys)
+    spread = sum((x - meanx) ** 2 for x in xs)
+    slope = sum((x - meanx) * (y - meany) for (x, y) in zip(xs, ys)) / spread if spread else 0.0
+    (size, secs, peak, median) = curve[-1]
+    return (slope, secs / size, peak / size)
+
+# Sizes where one candidate overtakes another, interpolated in log space
+# between measured sizes. Sizes where the two candidates' best to median
+# time spreads overlap, or their best times are within tolerance of each
+# other, are timing noise and skipped, and so is a lone size where the
+# lead flips and flips back at the next one (a disturbed batch), so a
+# crossover is only reported between sizes where each candidate is
+# clearly ahead on its side. Returns [(faster above, slower above, size)]
+def crossovers(curves, tolerance=0.05):
+    found = []
+    names = list(curves)
+    for (i, a) in enumerate(names):
+        for b in names[i + 1:]:
+            ratios = [(size, math.log(ta / tb))
+                      for ((size, ta, pa, ma), (_, tb, pb, mb)) in zip(curves[a], curves[b])
+                      if (ma < tb or mb < ta) and abs(math.log(ta / tb)) > math.log1p(tolerance)]
+            ratios = [ratios[k] for k in range(len(ratios))
+                      if not 0 < k < len(ratios) - 1 or
+                         (ratios[k - 1][1] < 0) == (ratios[k][1] < 0) or
+                         (ratios[k][1] < 0) == (ratios[k + 1][1] < 0)]
+            for ((n1, r1), (n2, r2)) in zip(ratios, ratios[1:]):
+                if (r1 < 0) != (r2 < 0):
+                    where = math.exp(math.log(n1) + (math.log(n2) - math.log(n1)) * r1 / (r1 - r2))
+                    found.append((a, b, round(where)) if r2 < 0 else (b, a, round(where)))
+    return found
+
+def sweepreport(curves):
+    print(sys.version)
+    sizes = [size for (size, secs, peak, median) in next(iter(curves.values()))]
+    print('%-9s  %s' % ('secs', ' '.join('%10d' % size for size in sizes)))
+    for (name, curve) in curves.items():
+        print('%-9s: %s' % (name, ' '.join('%10.3g' % secs for (size, secs, peak, median) in curve)))
+    print()
+    for (name, curve) in curves.items():
+        (slope, secs, peak) = fit(curve)
+        print('%-9s: time ~ n**%.2f, %.3g secs/elem, %.1f bytes/elem peak' %
+              (name, slope, secs, peak))
+    for (faster, slower, size) in crossovers(curves):
+        print('%s overtakes %s near n=%d' % (faster, slower, size))
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        import argparse
+        parser = argparse.ArgumentParser(description='Time the sequence builders')
+        parser.add_argument('names', nargs='*', help='candidates to run, default all')
+        parser.add_argument('--isolated', action='store_true',
+                            help='run each candidate in a fresh process')
+        parser.add_argument('-j', '--workers', type=int, default=1,
+                            help='candidates to run at once, with --isolated')
+        parser.add_argument('--pin', action='store_true',
+                            help='pin each candidate to one CPU, with --isolated')
+        parser.add_argument('--store', nargs='?', const='', metavar='LABEL',
+                            help='save the timings to the benchmark store')
+        parser.add_argument('--memory', action='store_true',
+                            help='profile allocations and GC runs per call')
+        parser.add_argument('--sweep', action='store_true',
+                            help='time every candidate over a range of input sizes')
+        parser.add_argument('--min', type=int, default=100, help='smallest sweep size')
+        parser.add_argument('--max', type=int, default=10 ** 6, help='largest sweep size')
+        parser.add_argument('--factor', type=int, default=10, help='sweep size step')
+        args = parser.parse_args()
+        if args.sweep:
+            sweepreport(sweep(args.min, args.max, args.factor, args.names))
+            sys.exit()
+        if args.isolated:
+            results = isolated(args.names, args.workers, args.pin, args.memory)
+        else:
+            results = [runone(name, None, args.memory)
+                       for name in args.names or [t.__name__ for t in tests]]
+        report(results)
+        if args.store is not None:
+            import benchstore
+            benchstore.record('timeseqs', [stats for (*row, stats) in results], args.store or None)
+    else:
+        print(sys.version)
+        for test in tests:
+            (bestof, (total, result)) = timer.bestoftotal(5, 1000, test)
+            print ('%-9s: %.5f => [%s...%s]' %
+               (test.__name__, bestof, result[0], result[-1]))